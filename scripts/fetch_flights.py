@@ -7,8 +7,18 @@ Saves raw response to data/raw/response.json
 
 import os
 import json
+import time
+import gzip
+import asyncio
+import hashlib
+import logging
 from pathlib import Path
-import requests
+import httpx
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from datetime import datetime, timezone, timedelta
 
 from dotenv import load_dotenv
@@ -20,13 +30,19 @@ ROOT = Path(__file__).resolve().parent.parent
 CONFIG_PATH = ROOT / "config" / "query_params.json"
 RAW_DIR = ROOT / "data" / "raw"
 RAW_DIR.mkdir(parents=True, exist_ok=True)
-OUT_FILE = RAW_DIR / "response.json"
+OUT_FILE = RAW_DIR / "response.json.gz"
+CACHE_DIR = ROOT / "data" / "cache"
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_TTL = 15 * 60  # seconds before an entry is revalidated with the API
 
 RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")  # set as GitHub Actions secret
 
 # IST timezone (UTC+5:30)
 IST = timezone(timedelta(hours=5, minutes=30))
 
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+log = logging.getLogger(__name__)
+
 def load_query():
     if not CONFIG_PATH.exists():
         raise FileNotFoundError(f"{CONFIG_PATH} not found. Create config/query_params.json")
@@ -43,34 +59,99 @@ def build_params(query):
         params[k] = str(v)
     return params
 
-def call_api(params):
+def cache_paths(params):
+    key = hashlib.blake2b(
+        json.dumps(params, sort_keys=True).encode(), digest_size=16
+    ).hexdigest()
+    return CACHE_DIR / f"{key}.json", CACHE_DIR / f"{key}.meta.json"
+
+def read_cached(body_file):
+    if orjson is not None:
+        return orjson.loads(body_file.read_bytes())
+    return json.loads(body_file.read_text(encoding="utf-8"))
+
+async def call_api(client, params):
+    body_file, meta_file = cache_paths(params)
+    cond_headers = {}
+    if body_file.exists():
+        age = time.time() - body_file.stat().st_mtime
+        if age < CACHE_TTL:
+            log.info("Cache hit for params (%ds old), skipping API call", age)
+            return read_cached(body_file)
+        try:
+            meta = json.loads(meta_file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            meta = {}
+        if meta.get("etag"):
+            cond_headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            cond_headers["If-Modified-Since"] = meta["last_modified"]
+    # never log headers here: they carry the RapidAPI key
+    log.debug("calling %s params=%s", API_URL, params)
+    resp = await client.get(API_URL, params=params, headers=cond_headers)
+    if resp.status_code == 304 and body_file.exists():
+        log.info("API returned 304 Not Modified, using cached response")
+        body_file.touch()  # reset the TTL clock
+        return read_cached(body_file)
+    resp.raise_for_status()
+    body = resp.json()
+    if orjson is not None:
+        body_file.write_bytes(orjson.dumps(body))
+    else:
+        body_file.write_text(json.dumps(body), encoding="utf-8")
+    meta = {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+    }
+    meta_file.write_text(json.dumps(meta), encoding="utf-8")
+    return body
+
+async def fetch_all(queries):
     if not RAPIDAPI_KEY:
         raise EnvironmentError("RAPIDAPI_KEY not set in environment")
     headers = {
         "x-rapidapi-key": RAPIDAPI_KEY,
         "x-rapidapi-host": "booking-com15.p.rapidapi.com"
     }
-    print(API_URL)
-    print(headers)
-    print(params)
-    resp = requests.get(API_URL, headers=headers, params=params, timeout=60)
-    resp.raise_for_status()
-    return resp.json()
+    # One HTTP/2 connection multiplexes all queries; retries cover
+    # transient connect failures
+    async with httpx.AsyncClient(
+        http2=True,
+        headers=headers,
+        timeout=60,
+        limits=httpx.Limits(max_keepalive_connections=8),
+        transport=httpx.AsyncHTTPTransport(http2=True, retries=3),
+    ) as client:
+        return await asyncio.gather(*(call_api(client, build_params(q)) for q in queries))
 
-def save_raw(resp):
+def save_raw(resp, out_file=OUT_FILE, fetched_at=None):
     meta = {
-        "fetched_at": datetime.now(IST).isoformat()
+        "fetched_at": fetched_at or datetime.now(IST).isoformat(timespec="seconds")
     }
-    with open(OUT_FILE, "w", encoding="utf-8") as f:
-        json.dump({"meta": meta, "response": resp}, f, indent=2)
-    print(f"Saved raw response to {OUT_FILE}")
+    # compact JSON (no indent), gzipped: the raw artifact is machine-read only
+    if orjson is not None:
+        payload = orjson.dumps({"meta": meta, "response": resp})
+    else:
+        payload = json.dumps({"meta": meta, "response": resp}).encode("utf-8")
+    # write to a tmp file and rename so a cancelled run never leaves a
+    # truncated artifact for process_response to trip over
+    tmp = out_file.with_name(out_file.name + ".tmp")
+    with gzip.open(tmp, "wb", compresslevel=3) as f:
+        f.write(payload)
+    os.replace(tmp, out_file)
+    log.info("Saved raw response to %s", out_file)
 
 def main():
     query = load_query()
-    params = build_params(query)
-    print("Calling API with params:", params)
-    resp = call_api(params)
-    save_raw(resp)
+    # config may be a single query dict or a list of them; all queries
+    # in a list are fetched concurrently
+    queries = query if isinstance(query, list) else [query]
+    responses = asyncio.run(fetch_all(queries))
+    # one timestamp for the whole batch, not one per file
+    fetched_at = datetime.now(IST).isoformat(timespec="seconds")
+    for i, resp in enumerate(responses):
+        out_file = OUT_FILE if i == 0 else RAW_DIR / f"response_{i}.json.gz"
+        save_raw(resp, out_file, fetched_at)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
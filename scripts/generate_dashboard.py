@@ -8,10 +8,17 @@ Builds dashboard with:
 """
 
 import json
+import gzip
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
-import csv
-from jinja2 import Template
+from operator import itemgetter
+import pandas as pd
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # IST timezone (UTC+5:30)
 IST = timezone(timedelta(hours=5, minutes=30))
@@ -23,34 +30,64 @@ HISTORY_CSV = ROOT / "data" / "history" / "price_log.csv"
 OUT_DIR = ROOT / "dashboard"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 OUT_HTML = OUT_DIR / "index.html"
+TEMPLATE_DIR = ROOT / "templates"
+JINJA_CACHE = ROOT / ".jinja_cache"
+JINJA_CACHE.mkdir(exist_ok=True)
+
+# bytecode cache persists the compiled template across runs, skipping
+# the parse/codegen step on every cron invocation
+_env = Environment(
+    loader=FileSystemLoader(str(TEMPLATE_DIR)),
+    bytecode_cache=FileSystemBytecodeCache(str(JINJA_CACHE)),
+    autoescape=select_autoescape(["html"]),
+)
+TEMPLATE = _env.get_template("dashboard.html")
 
 
 def load_json(path):
+    if orjson is not None:
+        return orjson.loads(Path(path).read_bytes())
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
 def load_history():
-    dates, prices = [], []
-    if HISTORY_CSV.exists():
-        with open(HISTORY_CSV, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Support both old (date_utc) and new (date_ist) column names
-                date_col = row.get("date_ist") or row.get("date_utc")
-                if date_col:
-                    dates.append(date_col)
-                    prices.append(int(row["min_price"]))
-    return dates, prices
+    if not HISTORY_CSV.exists():
+        return [], []
+    df = pd.read_csv(HISTORY_CSV, engine="c")
+    # Support both old (date_utc) and new (date_ist) column names
+    date_col = "date_ist" if "date_ist" in df.columns else "date_utc"
+    return df[date_col].tolist(), df["min_price"].astype(int).tolist()
 
 
 def build_offers_table(offers, title):
     if not offers:
         return f"<div class='card'><h3>{title}</h3><p>No flights available</p></div>"
-    rows = "".join(
-        f"<tr><td>{o.get('airline')}</td><td>{o.get('from')} ({o.get('from_code')})</td><td>{o.get('to')} ({o.get('to_code')})</td><td>{o.get('departure_time')}</td><td>{o.get('arrival_time')}</td><td>₹{o.get('price')}</td><td>{o.get('stops')} stops</td></tr>"
-        for o in offers
-    )
+    # build each cell into a flat list and join once: one big str instead of
+    # an f-string allocation per row
+    parts = []
+    ap = parts.append
+    for o in offers:
+        ap("<tr><td>")
+        ap(str(o.get("airline")))
+        ap("</td><td>")
+        ap(str(o.get("from")))
+        ap(" (")
+        ap(str(o.get("from_code")))
+        ap(")</td><td>")
+        ap(str(o.get("to")))
+        ap(" (")
+        ap(str(o.get("to_code")))
+        ap(")</td><td>")
+        ap(str(o.get("departure_time")))
+        ap("</td><td>")
+        ap(str(o.get("arrival_time")))
+        ap("</td><td>₹")
+        ap(str(o.get("price")))
+        ap("</td><td>")
+        ap(str(o.get("stops")))
+        ap(" stops</td></tr>")
+    rows = "".join(parts)
     return f"""
     <div class="card">
       <h3>{title}</h3>
@@ -62,120 +99,16 @@ def build_offers_table(offers, title):
     """
 
 
-TEMPLATE = Template("""
-<!doctype html>
-<html>
-<head>
-  <meta charset="utf-8" />
-  <title>Flight Dashboard</title>
-  <meta name="viewport" content="width=device-width, initial-scale=1" />
-  <style>
-    body { font-family: Inter, system-ui, -apple-system, "Segoe UI", Roboto, "Helvetica Neue", Arial; margin: 24px; background:#fafafa; }
-    h1 { margin-bottom:8px; }
-    .card { border-radius: 8px; padding: 16px; margin-bottom: 20px; background:white; box-shadow: 0 2px 6px rgba(0,0,0,0.08); }
-    pre { background:#f6f8fa; padding:12px; border-radius:6px; overflow:auto; }
-    table { border-collapse: collapse; width: 100%; }
-    th, td { text-align:left; padding:8px; border-bottom:1px solid #eee; }
-    .top-metrics { display:flex; flex-wrap:wrap; gap:16px; }
-    .metric { background:#fff; padding:12px; border-radius:8px; min-width:160px; box-shadow:0 1px 4px rgba(0,0,0,0.04);}
-    .metric strong { font-size:1.2em; color:#2c3e50;}
-    canvas { max-width: 100%; margin-top: 12px; }
-  </style>
-  <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-</head>
-<body>
-  <h1>✈️ Flight Dashboard</h1>
-  <div class="card">
-    <strong>Query</strong>
-    <pre>{{ query_str }}</pre>
-    <small>Last generated: {{ ts }}</small>
-  </div>
-
-  <div class="card top-metrics">
-    <div class="metric"><h4>Cheapest overall</h4><strong>₹{{ summary.minPrice or "N/A" }}</strong></div>
-    <div class="metric"><h4>Cheapest non-stop</h4><strong>₹{{ cheapest_nonstop or "N/A" }}</strong></div>
-    <div class="metric"><h4>Cheapest 1-stop</h4><strong>₹{{ cheapest_onestop or "N/A" }}</strong></div>
-    <div class="metric"><h4>Cheapest multi-stop</h4><strong>₹{{ cheapest_multistop or "N/A" }}</strong></div>
-  </div>
-
-  {{ non_stop_table | safe }}
-  {{ one_stop_table | safe }}
-  {{ multi_stop_table | safe }}
-
-  <div class="card">
-    <h2>Stops breakdown</h2>
-    <canvas id="stopsChart"></canvas>
-  </div>
-
-  <div class="card">
-    <h2>Departure time slots</h2>
-    <canvas id="slotsChart"></canvas>
-  </div>
-
-  <div class="card">
-    <h2>Price history</h2>
-    <canvas id="historyChart"></canvas>
-  </div>
-
-  <footer style="margin-top:24px;color:#666;">Built: {{ ts }}</footer>
-
-<script>
-const stopsCtx = document.getElementById('stopsChart');
-new Chart(stopsCtx, {
-    type: 'bar',
-    data: {
-        labels: {{ stops_labels | safe }},
-        datasets: [{
-            label: 'Flights',
-            data: {{ stops_counts | safe }},
-            backgroundColor: 'rgba(54, 162, 235, 0.7)'
-        }]
-    }
-});
-
-const slotsCtx = document.getElementById('slotsChart');
-new Chart(slotsCtx, {
-    type: 'bar',
-    data: {
-        labels: {{ slots_labels | safe }},
-        datasets: [{
-            label: 'Flights',
-            data: {{ slots_counts | safe }},
-            backgroundColor: 'rgba(255, 159, 64, 0.7)'
-        }]
-    }
-});
-
-const historyCtx = document.getElementById('historyChart');
-new Chart(historyCtx, {
-    type: 'line',
-    data: {
-        labels: {{ history_dates | safe }},
-        datasets: [{
-            label: 'Min Price (₹)',
-            data: {{ history_prices | safe }},
-            borderColor: 'rgba(75, 192, 192, 1)',
-            fill: false
-        }]
-    }
-});
-</script>
-
-</body>
-</html>
-""")
 
 
 def main():
     try:
-        with open(CONFIG, "r", encoding="utf-8") as f:
-            query = json.load(f)
+        query = load_json(CONFIG)
     except FileNotFoundError:
         query = {}
 
     try:
-        with open(SUMMARY_FILE, "r", encoding="utf-8") as f:
-            summary = json.load(f)
+        summary = load_json(SUMMARY_FILE)
     except FileNotFoundError:
         summary = {"offersByStops": {"nonstop": [], "1stop": [], "multistop": []}}
 
@@ -189,12 +122,14 @@ def main():
     cheapest_onestop = summary.get("offersByStops", {}).get("1stop", [{}])[0].get("price") if summary.get("offersByStops", {}).get("1stop") else None
     cheapest_multistop = summary.get("offersByStops", {}).get("multistop", [{}])[0].get("price") if summary.get("offersByStops", {}).get("multistop") else None
 
-    # Chart data
-    stops_labels = [str(s["numberOfStops"]) for s in summary.get("stops", [])]
-    stops_counts = [s["count"] for s in summary.get("stops", [])]
+    # Chart data: map + itemgetter run the extraction loops in C
+    stops = summary.get("stops", [])
+    stops_labels = list(map(str, map(itemgetter("numberOfStops"), stops)))
+    stops_counts = list(map(itemgetter("count"), stops))
 
-    slots_labels = [s["start"] for s in summary.get("departureSlots", [])]
-    slots_counts = [s["count"] for s in summary.get("departureSlots", [])]
+    slots = summary.get("departureSlots", [])
+    slots_labels = list(map(itemgetter("start"), slots))
+    slots_counts = list(map(itemgetter("count"), slots))
 
     history_dates, history_prices = load_history()
 
@@ -216,9 +151,12 @@ def main():
         history_prices=history_prices,
     )
 
-    with open(OUT_HTML, "w", encoding="utf-8") as f:
-        f.write(html)
-    print(f"Wrote dashboard to {OUT_HTML}")
+    html_bytes = html.encode("utf-8")
+    OUT_HTML.write_bytes(html_bytes)
+    # pre-gzipped copy so static hosts can serve compressed bytes directly
+    with gzip.open(OUT_HTML.with_suffix(".html.gz"), "wb", compresslevel=6) as f:
+        f.write(html_bytes)
+    print(f"Wrote dashboard to {OUT_HTML} (+ .gz)")
 
 
 if __name__ == "__main__":
@@ -6,16 +6,38 @@ Reads data/raw/response.json and produces:
  - data/history/price_log.csv
 """
 
+import os
 import json
+import gzip
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from operator import itemgetter
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
-import csv
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
 
 # IST timezone (UTC+5:30)
 IST = timezone(timedelta(hours=5, minutes=30))
 
 ROOT = Path(__file__).resolve().parent.parent
-RAW_FILE = ROOT / "data" / "raw" / "response.json"
+RAW_DIR = ROOT / "data" / "raw"
+# prefer the gzipped artifact, fall back to plain JSON from older runs
+RAW_FILES = [RAW_DIR / "response.json.gz", RAW_DIR / "response.json"]
 PROC_DIR = ROOT / "data" / "processed"
 HIST_DIR = ROOT / "data" / "history"
 PROC_DIR.mkdir(parents=True, exist_ok=True)
@@ -23,13 +45,134 @@ HIST_DIR.mkdir(parents=True, exist_ok=True)
 SUMMARY_FILE = PROC_DIR / "summary.json"
 HISTORY_CSV = HIST_DIR / "price_log.csv"
 
+MAX_OFFERS = 50  # look at first 50 offers only
+STREAM_THRESHOLD = 256 * 1024  # stream-parse responses larger than this
+
+
+def find_raw_file():
+    for p in RAW_FILES:
+        if p.exists():
+            return p
+    return None
+
+
+def open_raw(raw_file):
+    if raw_file.suffix == ".gz":
+        return gzip.open(raw_file, "rb")
+    return open(raw_file, "rb")
+
+
+def load_raw(raw_file):
+    """Load the raw response, parsing only the subtrees we actually use
+    (aggregation + first MAX_OFFERS flightOffers) when the file is large."""
+    if ijson is not None and raw_file.stat().st_size >= STREAM_THRESHOLD:
+        with open_raw(raw_file) as f:
+            agg = next(ijson.items(f, "response.data.aggregation"), {})
+        with open_raw(raw_file) as f:
+            offers = list(islice(ijson.items(f, "response.data.flightOffers.item"), MAX_OFFERS))
+        return {"response": {"data": {"aggregation": agg, "flightOffers": offers}}}
+    with open_raw(raw_file) as f:
+        if orjson is not None:
+            return orjson.loads(f.read())
+        return json.load(f)
+
 
 def safe_get(d, *keys, default=None):
-    for k in keys:
-        if not isinstance(d, dict):
-            return default
-        d = d.get(k, default)
-    return d
+    # plain subscripting + except is cheaper than isinstance/.get per level
+    try:
+        for k in keys:
+            d = d[k]
+        return d
+    except (KeyError, IndexError, TypeError):
+        return default
+
+
+if msgspec is not None:
+    # Typed view of the subset of the Booking response we actually read.
+    # msgspec decodes straight into these structs in C and skips every
+    # undeclared field, so unused subtrees are never materialized.
+
+    class _Price(msgspec.Struct):
+        units: int | None = None
+
+    class _Named(msgspec.Struct):
+        name: str | None = None
+
+    class _StopsAgg(msgspec.Struct):
+        numberOfStops: int | None = None
+        count: int | None = None
+        cheapestAirline: _Named | None = None
+        minPrice: _Price | None = None
+
+    class _AirlineAgg(msgspec.Struct):
+        name: str | None = None
+        count: int | None = None
+        minPrice: _Price | None = None
+        minPricePerAdult: _Price | None = None
+
+    class _Slot(msgspec.Struct):
+        start: str | None = None
+        count: int | None = None
+
+    class _FlightTimes(msgspec.Struct):
+        departure: list[_Slot] = []
+
+    class _Aggregation(msgspec.Struct):
+        totalCount: int = 0
+        filteredTotalCount: int = 0
+        minPrice: _Price | None = None
+        durationMin: int | None = None
+        durationMax: int | None = None
+        stops: list[_StopsAgg] = []
+        airlines: list[_AirlineAgg] = []
+        flightTimes: list[_FlightTimes] = []
+
+    class _Carrier(msgspec.Struct):
+        name: str | None = None
+        displayName: str | None = None
+        marketingCarrier: _Named | None = None
+
+    class _Leg(msgspec.Struct):
+        carriersData: list[_Carrier] = []
+
+    class _Airport(msgspec.Struct):
+        code: str | None = None
+        cityName: str | None = None
+
+    class _Segment(msgspec.Struct):
+        departureAirport: _Airport | None = None
+        arrivalAirport: _Airport | None = None
+        departureTime: str | None = None
+        arrivalTime: str | None = None
+        totalTime: int = 0
+        legs: list[_Leg] = []
+
+    class _PriceBreakdown(msgspec.Struct):
+        total: _Price | None = None
+
+    class _Offer(msgspec.Struct):
+        priceBreakdown: _PriceBreakdown | None = None
+        segments: list[_Segment] = []
+
+    class _Data(msgspec.Struct):
+        aggregation: _Aggregation | None = None
+        flightOffers: list[_Offer] = []
+
+    class _Response(msgspec.Struct):
+        data: _Data | None = None
+
+    class RawResponse(msgspec.Struct):
+        response: _Response | None = None
+
+
+# precompiled accessors for the fixed offer schema; itemgetter is
+# C-implemented, so chained calls inside a try/except skip the
+# per-level Python dispatch that safe_get pays
+_g_price = itemgetter("priceBreakdown")
+_g_total = itemgetter("total")
+_g_units = itemgetter("units")
+_g_dep_airport = itemgetter("departureAirport")
+_g_arr_airport = itemgetter("arrivalAirport")
 
 
 def extract_airline(seg):
@@ -94,30 +237,42 @@ def extract_summary(raw):
                 {"start": dslot.get("start"), "count": dslot.get("count")}
             )
 
-    # offers
-    flight_offers = data.get("flightOffers", [])[:50]  # look at first 50
-    offers_all = []
+    # offers: bucket into per-stop-type min-heaps in a single pass, keyed
+    # on (price, seq) so heap entries never compare the offer dicts
+    flight_offers = data.get("flightOffers", [])[:MAX_OFFERS]
+    bucket_heaps = {"nonstop": [], "1stop": [], "multistop": []}
+    seq = 0
     for offer in flight_offers:
         try:
-            price = safe_get(offer, "priceBreakdown", "total", "units")
+            try:
+                price = _g_units(_g_total(_g_price(offer)))
+            except (KeyError, TypeError):
+                price = None
             segs = offer.get("segments", [])
             if not segs:
                 continue
 
-            dep_air = safe_get(segs[0], "departureAirport", "cityName")
-            arr_air = safe_get(segs[-1], "arrivalAirport", "cityName")
-            dep_code = safe_get(segs[0], "departureAirport", "code")
-            arr_code = safe_get(segs[-1], "arrivalAirport", "code")
-            dep_time = safe_get(segs[0], "departureTime")
-            arr_time = safe_get(segs[-1], "arrivalTime")
+            first_seg, last_seg = segs[0], segs[-1]
+            try:
+                dep = _g_dep_airport(first_seg)
+                dep_air, dep_code = dep.get("cityName"), dep.get("code")
+            except (KeyError, TypeError):
+                dep_air = dep_code = None
+            try:
+                arr = _g_arr_airport(last_seg)
+                arr_air, arr_code = arr.get("cityName"), arr.get("code")
+            except (KeyError, TypeError):
+                arr_air = arr_code = None
+            dep_time = first_seg.get("departureTime")
+            arr_time = last_seg.get("arrivalTime")
 
             total_time_sec = sum(s.get("totalTime", 0) for s in segs)
             duration_minutes = (
                 total_time_sec // 60 if isinstance(total_time_sec, int) else None
             )
 
-            airline = extract_airline(segs[0])
-            legs = segs[0].get("legs", [])
+            airline = extract_airline(first_seg)
+            legs = first_seg.get("legs", [])
             num_legs = len(legs)
             if num_legs == 1:
                 stop_type = "nonstop"
@@ -138,48 +293,162 @@ def extract_summary(raw):
                 "duration_minutes": duration_minutes,
                 "stops": num_legs - 1,  # stops = legs-1
             }
-            offers_all.append(entry)
-            summary["offersByStops"][stop_type].append(entry)
+            heapq.heappush(bucket_heaps[stop_type], (price or 1e9, seq, entry))
+            seq += 1
         except Exception:
             continue
 
-    # sort and keep top 5 cheapest for each stop type
-    for k, arr in summary["offersByStops"].items():
-        summary["offersByStops"][k] = sorted(arr, key=lambda x: x["price"] or 1e9)[:5]
+    # top 5 cheapest per stop type, top 10 overall; nsmallest is O(n log k)
+    # and skips sorting the full lists
+    for k, h in bucket_heaps.items():
+        summary["offersByStops"][k] = [e for _, _, e in heapq.nsmallest(5, h)]
+
+    summary["topOffers"] = [
+        e for _, _, e in heapq.nsmallest(10, chain.from_iterable(bucket_heaps.values()))
+    ]
+    return summary
+
+
+def extract_airline_typed(seg):
+    if not seg.legs or not seg.legs[0].carriersData:
+        return None
+    carrier = seg.legs[0].carriersData[0]
+    marketing = carrier.marketingCarrier.name if carrier.marketingCarrier else None
+    return marketing or carrier.name or carrier.displayName
+
+
+def extract_summary_typed(raw):
+    """extract_summary over the msgspec structs: same output shape, but
+    typed attribute access instead of dict traversal."""
+    data = (raw.response.data if raw.response else None) or _Data()
+    agg = data.aggregation or _Aggregation()
+
+    summary = {
+        "totalFlights": agg.totalCount,
+        "filteredFlights": agg.filteredTotalCount,
+        "minPrice": agg.minPrice.units if agg.minPrice else None,
+        "durationMin": agg.durationMin,
+        "durationMax": agg.durationMax,
+        "stops": [
+            {
+                "numberOfStops": s.numberOfStops,
+                "count": s.count,
+                "cheapestAirline": s.cheapestAirline.name if s.cheapestAirline else None,
+                "minPrice": s.minPrice.units if s.minPrice else None,
+            }
+            for s in agg.stops
+        ],
+        "airlines": [
+            {
+                "name": a.name,
+                "count": a.count,
+                "minPrice": a.minPrice.units if a.minPrice else None,
+                "minPricePerAdult": a.minPricePerAdult.units if a.minPricePerAdult else None,
+            }
+            for a in agg.airlines
+        ],
+        "departureSlots": [
+            {"start": d.start, "count": d.count}
+            for d in (agg.flightTimes[0].departure if agg.flightTimes else [])
+        ],
+        "offersByStops": {"nonstop": [], "1stop": [], "multistop": []},
+    }
+
+    bucket_heaps = {"nonstop": [], "1stop": [], "multistop": []}
+    seq = 0
+    for offer in data.flightOffers[:MAX_OFFERS]:
+        segs = offer.segments
+        if not segs:
+            continue
+        pb = offer.priceBreakdown
+        price = pb.total.units if pb and pb.total else None
+        first_seg, last_seg = segs[0], segs[-1]
+        dep = first_seg.departureAirport or _Airport()
+        arr = last_seg.arrivalAirport or _Airport()
+
+        num_legs = len(first_seg.legs)
+        if num_legs == 1:
+            stop_type = "nonstop"
+        elif num_legs == 2:
+            stop_type = "1stop"
+        else:
+            stop_type = "multistop"
+
+        entry = {
+            "price": price,
+            "airline": extract_airline_typed(first_seg),
+            "from": dep.cityName,
+            "to": arr.cityName,
+            "from_code": dep.code,
+            "to_code": arr.code,
+            "departure_time": first_seg.departureTime,
+            "arrival_time": last_seg.arrivalTime,
+            "duration_minutes": sum(s.totalTime for s in segs) // 60,
+            "stops": num_legs - 1,  # stops = legs-1
+        }
+        heapq.heappush(bucket_heaps[stop_type], (price or 1e9, seq, entry))
+        seq += 1
 
-    summary["topOffers"] = sorted(offers_all, key=lambda x: x["price"] or 1e9)[:10]
+    for k, h in bucket_heaps.items():
+        summary["offersByStops"][k] = [e for _, _, e in heapq.nsmallest(5, h)]
+
+    summary["topOffers"] = [
+        e for _, _, e in heapq.nsmallest(10, chain.from_iterable(bucket_heaps.values()))
+    ]
     return summary
 
 
 def write_summary(summary):
-    with open(SUMMARY_FILE, "w", encoding="utf-8") as f:
-        json.dump(summary, f, indent=2)
+    # tmp + rename keeps the previous summary intact if the run is killed
+    # mid-write
+    tmp = SUMMARY_FILE.with_name(SUMMARY_FILE.name + ".tmp")
+    if orjson is not None:
+        with open(tmp, "wb") as f:
+            f.write(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
+    else:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    os.replace(tmp, SUMMARY_FILE)
     print(f"Wrote summary to {SUMMARY_FILE}")
 
 
 def append_history(min_price):
-    write_header = not HISTORY_CSV.exists()
-    with open(HISTORY_CSV, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        if write_header:
-            writer.writerow(["date_ist", "min_price"])
-        writer.writerow([datetime.now(IST).strftime("%Y-%m-%dT%H:%M:%S%z"), min_price])
+    # just two plain columns: compose the line directly instead of spinning
+    # up csv.writer, and append it in a single buffered write
+    # isoformat is C-implemented; strftime parses its format string per call
+    line = f"{datetime.now(IST).isoformat(timespec='seconds')},{min_price}\n".encode()
+    if not HISTORY_CSV.exists():
+        line = b"date_ist,min_price\n" + line
+    with open(HISTORY_CSV, "ab") as f:
+        f.write(line)
     print(f"Appended history to {HISTORY_CSV}")
 
 
 def main():
-    if not RAW_FILE.exists():
-        raise FileNotFoundError(f"{RAW_FILE} missing. Run fetch_flights.py first.")
-    with open(RAW_FILE, "r", encoding="utf-8") as f:
-        raw = json.load(f)
-    summary = extract_summary(raw)
-    write_summary(summary)
+    raw_file = find_raw_file()
+    if raw_file is None:
+        raise FileNotFoundError(f"{RAW_FILES[0]} missing. Run fetch_flights.py first.")
+    summary = None
+    if msgspec is not None:
+        try:
+            with open_raw(raw_file) as f:
+                summary = extract_summary_typed(msgspec.json.decode(f.read(), type=RawResponse))
+        except msgspec.ValidationError as e:
+            print("Schema-aware decode failed, falling back to dict parse:", e)
+    if summary is None:
+        summary = extract_summary(load_raw(raw_file))
     min_price = summary.get("minPrice")
-    try:
-        if min_price is not None:
-            append_history(min_price)
-    except Exception as e:
-        print("Failed to append history:", e)
+    # both writes touch independent files; overlapping them hides the
+    # slower one's I/O latency behind the other
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        summary_future = ex.submit(write_summary, summary)
+        history_future = ex.submit(append_history, min_price) if min_price is not None else None
+        summary_future.result()
+        if history_future is not None:
+            try:
+                history_future.result()
+            except Exception as e:
+                print("Failed to append history:", e)
 
 
 if __name__ == "__main__":